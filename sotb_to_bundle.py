@@ -1,23 +1,187 @@
 #!/usr/bin/env humblepy
 import argparse
 import csv
+import json
 import math
 import os
 import re
 import unidecode
 import urllib
 
+from collections import OrderedDict
 from datetime import datetime
-from decimal import getcontext
+from decimal import Context
 from decimal import Decimal
+from decimal import Inexact
+from decimal import InvalidOperation
+from decimal import ROUND_HALF_EVEN
 from libraries.aetycoon.prettydata import prettify
 from libraries.cdn import signurl
 from mutagen.mp3 import MP3
 
 
+# Maximum number of transliterated strings kept by no_unicode()
+NO_UNICODE_CACHE_SIZE = 1024
+
+_non_ascii = re.compile(r'[\x80-\xff]')
+_no_unicode_cache = OrderedDict()
+_no_unicode_stats = {'ascii': 0, 'hits': 0, 'misses': 0}
+
+
 # Helper function for no unicode problems
+# 7-bit text is returned as is, other results are kept in a bounded LRU cache
 def no_unicode(text):
-  return unidecode.unidecode(unicode(text, encoding='utf-8'))
+  if _non_ascii.search(text) is None:
+    _no_unicode_stats['ascii'] += 1
+    return text
+  if text in _no_unicode_cache:
+    _no_unicode_stats['hits'] += 1
+    result = _no_unicode_cache.pop(text)
+    _no_unicode_cache[text] = result
+    return result
+
+  _no_unicode_stats['misses'] += 1
+  result = unidecode.unidecode(unicode(text, encoding='utf-8'))
+  _no_unicode_cache[text] = result
+  while len(_no_unicode_cache) > NO_UNICODE_CACHE_SIZE:
+    _no_unicode_cache.popitem(last=False)
+  return result
+
+
+# Returns a one line summary of how no_unicode() calls were served so far
+def no_unicode_report():
+  stats = _no_unicode_stats
+  lookups = stats['hits'] + stats['misses']
+  if lookups == 0:
+    hit_rate = 0.0
+  else:
+    hit_rate = 100.0 * stats['hits'] / lookups
+  return 'no_unicode: %s ASCII, %s cache hits, %s misses (%.1f%% hit rate)' % (
+    stats['ascii'], stats['hits'], stats['misses'], hit_rate)
+
+
+# Columns every SOTB needs, in the order they are read by SotbRow
+SOTB_COLUMNS = (
+  # DisplayItem info
+  'machine_name', 'exists', 'override', 'human_name', 'callout',
+  'description', 'device', 'drm', 'platform', 'developer_name',
+  'developer_url', 'publisher_name', 'publisher_url', 'pdf_preview',
+  'slideout_image', 'audio', 'youtube',
+  # Split info
+  'payee', 'split_name', 'sib_split', 'partner_split', 'invisible_splits',
+  'subsplit_payee', 'subsplit_name', 'subsplit_sid', 'initial', 'mpa',
+  # Content Event info
+  'tier', 'subproducts', 'android_subproducts', 'soundtrack_subproducts',
+  'tpkds', 'coupondefinitions',
+  # Bundle-wide info (only read from the first row)
+  'mpa_date', 'humble_partners', 'one_dollar_min',
+)
+
+
+# Helper functions for converting raw SOTB cells ('0' means empty)
+def _flag(value):
+  return value != '0'
+
+
+def _optional(value):
+  if value == '0':
+    return None
+  return value
+
+
+def _multi(value, sep='+'):
+  if value == '0':
+    return ()
+  return tuple(value.split(sep))
+
+
+def _decimal(raw, column):
+  try:
+    return Decimal(raw[column])
+  except InvalidOperation:
+    raise ValueError('invalid number %r in column %s' % (raw[column], column))
+
+
+def _partner(raw, partner_type):
+  name = raw[partner_type + '_name']
+  url = raw[partner_type + '_url']
+  if name == '0' and url == '0':
+    return None
+  return (name, url)
+
+
+# A single row of the SOTB, with every cell converted to its final type once
+class SotbRow(object):
+  __slots__ = (
+    # DisplayItem info
+    'machine_name', 'exists', 'override', 'human_name', 'callout',
+    'description', 'device', 'drm', 'platform', 'developer', 'publisher',
+    'pdf_preview', 'slideout_image', 'audio', 'youtube',
+    # Split info
+    'payee', 'split_name', 'sib_split', 'partner_split', 'invisible_splits',
+    'subsplit_payee', 'subsplit_name', 'subsplit_sid', 'initial', 'mpa',
+    # Content Event info
+    'tier', 'subproducts', 'android_subproducts', 'soundtrack_subproducts',
+    'tpkds', 'coupondefinitions',
+    # Bundle-wide info (only read from the first row)
+    'mpa_date', 'humble_partners', 'one_dollar_min', 'lessthan1',
+  )
+
+  def __init__(self, raw):
+    self.machine_name = raw['machine_name']
+    self.exists = _flag(raw['exists'])
+    self.override = raw['override']
+    self.human_name = no_unicode(raw['human_name'])
+    self.callout = _optional(raw['callout'])
+    if self.callout is not None:
+      self.callout = no_unicode(self.callout)
+    self.description = _optional(raw['description'])
+    self.device = _multi(raw['device'])
+    self.drm = _multi(raw['drm'])
+    self.platform = _multi(raw['platform'])
+    # (name, url) pairs, or None when neither is filled in
+    self.developer = _partner(raw, 'developer')
+    self.publisher = _partner(raw, 'publisher')
+    self.pdf_preview = _flag(raw['pdf_preview'])
+    self.slideout_image = _flag(raw['slideout_image'])
+    self.audio = _flag(raw['audio'])
+    self.youtube = _optional(raw['youtube'])
+
+    self.payee = _optional(raw['payee'])
+    self.split_name = no_unicode(raw['split_name'])
+    # Split cells are only filled in on rows that actually have a payee
+    if self.payee is not None:
+      self.sib_split = _decimal(raw, 'sib_split')
+      if raw['partner_split'] != '0':
+        self.partner_split = _decimal(raw, 'partner_split')
+      else:
+        self.partner_split = None
+    else:
+      self.sib_split = None
+      self.partner_split = None
+    self.invisible_splits = _flag(raw['invisible_splits'])
+    self.subsplit_payee = _optional(raw['subsplit_payee'])
+    self.subsplit_name = no_unicode(raw['subsplit_name'])
+    self.subsplit_sid = _optional(raw['subsplit_sid'])
+    self.initial = _flag(raw['initial'])
+    self.mpa = _flag(raw['mpa'])
+
+    # None for rows that aren't part of any tier
+    if raw['tier'] in ('', '0'):
+      self.tier = None
+    else:
+      self.tier = raw['tier']
+    self.subproducts = _multi(raw['subproducts'], '\n')
+    self.android_subproducts = _multi(raw['android_subproducts'], '\n')
+    self.soundtrack_subproducts = _multi(raw['soundtrack_subproducts'], '\n')
+    self.tpkds = _multi(raw['tpkds'], '\n')
+    self.coupondefinitions = _multi(raw['coupondefinitions'], '\n')
+
+    self.mpa_date = _optional(raw['mpa_date'])
+    self.humble_partners = _flag(raw['humble_partners'])
+    self.one_dollar_min = _flag(raw['one_dollar_min'])
+    # The lessthan1 content event is only added for an explicit '1'
+    self.lessthan1 = raw['one_dollar_min'] == '1'
 
 
 # A list of all info on DisplayItems/Splits from the SOTB
@@ -26,11 +190,137 @@ def sotb(csvfile):
   sotb_info = []
   with open(csvfile) as c:
     reader = csv.DictReader(c)
+    missing = [column for column in SOTB_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+      raise ValueError('%s is missing SOTB columns: %s' % (csvfile, ', '.join(missing)))
     for row in reader:
-      sotb_info.append(row)
+      try:
+        sotb_info.append(SotbRow(row))
+      except ValueError as e:
+        raise ValueError('%s, line %s: %s' % (csvfile, reader.line_num, e))
   return sotb_info
 
 
+# Platforms available for each device/DRM combination on the storefront.
+# New storefronts can be added without code edits through a JSON file passed
+# with --platform-icons (see load_platform_icons()).
+PLAT_ICONS = {
+  'game': {
+    'steam': ['windows', 'mac', 'linux'],
+    'download': ['windows', 'mac', 'linux'],
+    'other-key': ['windows', 'mac', 'linux'],
+    'uplay': ['windows', 'mac', 'linux'],
+    'origin': ['windows', 'mac', 'linux'],
+    'wiiu': ['wiiu'],
+    '3DS': ['3DS'],
+    'ps3': ['ps3'],
+    'ps4': ['ps4'],
+    'xboxone': ['xboxone']
+  },
+  'mobile': {
+    'android': ['android'],
+    'iOS': ['iOS']
+  },
+  'video': {
+    'rifftrax': ['rifftrax'],
+    'video-download': ['hd', 'sd']
+  },
+  'music': {
+    'rifftrax': ['rifftrax'],
+    'audio-download': ['mp3', 'flac', 'ogg', 'wav']
+  }
+}
+
+# Platforms that are never listed under unavailable-platforms
+PLAT_ICONS_HIDDEN = ['android']
+
+# Platform combinations that don't need unavailable-platforms
+PLAT_ICONS_COMPLETE = [
+  ['windows', 'mac', 'linux'],
+  ['windows', 'mac', 'linux', 'android'],
+  ['android'],
+  ['rifftrax', 'mp3'],
+  ['rifftrax', 'sd', 'hd']
+]
+
+# Compiled versions of the tables above, rebuilt by _compile_platform_icons()
+_plat_icons = {}
+_plat_complete = frozenset()
+_plat_icons_cache = {}
+
+
+# Compiles PLAT_ICONS into {device: {drm: (platform_set, visible_platforms)}}
+def _compile_platform_icons():
+  global _plat_icons, _plat_complete
+  hidden = frozenset(PLAT_ICONS_HIDDEN)
+  _plat_icons = {}
+  for device, drms in PLAT_ICONS.items():
+    _plat_icons[device] = {}
+    for drm, plats in drms.items():
+      _plat_icons[device][drm] = (
+        frozenset(plats),
+        tuple(plat for plat in plats if plat not in hidden)
+      )
+  _plat_complete = frozenset(tuple(plats) for plats in PLAT_ICONS_COMPLETE)
+  _plat_icons_cache.clear()
+
+
+# Extends the platform icon tables with a JSON file of the form:
+#   {
+#     "icons": {"game": {"gog": ["windows", "mac", "linux"]}},
+#     "hidden": ["android"],
+#     "complete": [["rifftrax", "mp3"]]
+#   }
+# DRMs in "icons" are added to (or replace) the ones of that device, while
+# "hidden" and "complete" are added to the existing lists. Every key is
+# optional.
+def load_platform_icons(config_file):
+  with open(config_file) as f:
+    config = json.load(f)
+  for device, drms in config.get('icons', {}).items():
+    device_icons = PLAT_ICONS.setdefault(str(device), {})
+    for drm, plats in drms.items():
+      device_icons[str(drm)] = [str(plat) for plat in plats]
+  PLAT_ICONS_HIDDEN.extend(str(plat) for plat in config.get('hidden', []))
+  for plats in config.get('complete', []):
+    PLAT_ICONS_COMPLETE.append([str(plat) for plat in plats])
+  _compile_platform_icons()
+
+
+# Returns a new content or unavailable-platforms structure for a DisplayItem.
+# Lookups are memoized per combination as tuples, so callers get fresh lists.
+def build_platform_icons(type_icons, devices, drms, plats):
+  key = (devices, drms, plats)
+  if key not in _plat_icons_cache:
+    plat_set = frozenset(plats)
+    content = []
+    unavailable = []
+    for device in devices:
+      device_icons = _plat_icons[device]
+      device_content = []
+      for drm in drms:
+        if drm in device_icons:
+          drm_plat_set, visible_plats = device_icons[drm]
+          device_content.append(
+            (drm, tuple(plat for plat in plats if plat in drm_plat_set)))
+          unavailable.append(
+            (drm, tuple(plat for plat in visible_plats if plat not in plat_set)))
+      content.append((device, tuple(device_content)))
+    _plat_icons_cache[key] = (tuple(content), tuple(unavailable))
+
+  content, unavailable = _plat_icons_cache[key]
+  if type_icons == 'content':
+    return dict(
+      (device, dict((drm, list(drm_plats)) for drm, drm_plats in device_content))
+      for device, device_content in content
+    )
+  else:
+    return dict((drm, list(drm_plats)) for drm, drm_plats in unavailable)
+
+
+_compile_platform_icons()
+
+
 def di(row, existing_di=None):
   # Helper functions:
   # image_extra(),override(),
@@ -61,86 +351,39 @@ def di(row, existing_di=None):
     return pdf_preview
 
   def desc_process(text):
-    mc_match = re.search(r'(\D+:\s)(.*)\s(.*),\s(\d+)(.*)', text)
-    if mc_match:
-      text = "<p>Get 10% off one month of a Humble Monthly subscription!</p><p>NOTE: Expires on " + mc_match.group(2) + ' ' + mc_match.group(3) + ', ' + mc_match.group(4) + " at 10:00am Pacific. Eligible for new subscribers. Payment will be applied&nbsp;on&nbsp;the first payment for new subscribers.</p>"
-    if 'android' in row['device'].split('+'):
-      text += "<br /><br /><span style='text-decoration: underline;'>Size</span>: XX MB<br /><span style='text-decoration: underline;'>Requires Android</span>: XX and up<br /><br />Check out all the system requirements&nbsp;<a href='' target='_blank' rel='nofollow'>here</a>."
-    return no_unicode(text)
+    def desc_processor():
+      processed = text
+      mc_match = re.search(r'(\D+:\s)(.*)\s(.*),\s(\d+)(.*)', processed)
+      if mc_match:
+        processed = "<p>Get 10% off one month of a Humble Monthly subscription!</p><p>NOTE: Expires on " + mc_match.group(2) + ' ' + mc_match.group(3) + ', ' + mc_match.group(4) + " at 10:00am Pacific. Eligible for new subscribers. Payment will be applied&nbsp;on&nbsp;the first payment for new subscribers.</p>"
+      if 'android' in row.device:
+        processed += "<br /><br /><span style='text-decoration: underline;'>Size</span>: XX MB<br /><span style='text-decoration: underline;'>Requires Android</span>: XX and up<br /><br />Check out all the system requirements&nbsp;<a href='' target='_blank' rel='nofollow'>here</a>."
+      return no_unicode(processed)
+    return desc_processor
 
   def override(path):
-    if row['override'] != 'bundle':
-      return path + '_' + row['override']
+    if row.override != 'bundle':
+      return path + '_' + row.override
     else:
       return path
 
   def partners(partner_type):
     def my_partners():
-      if row[partner_type + '_name'] == '0' and row[partner_type + '_url'] == '0':
+      partner = getattr(row, partner_type)
+      if partner is None:
         return []
       else:
         return [
           {
-            partner_type + '-name': row[partner_type + '_name'],
-            partner_type + '-url': row[partner_type + '_url']
+            partner_type + '-name': partner[0],
+            partner_type + '-url': partner[1]
           }
         ]
     return my_partners
 
   def platform_icons(type_icons):
-    PLAT_ICONS = {
-      'game': {
-        'steam': ['windows', 'mac', 'linux'],
-        'download': ['windows', 'mac', 'linux'],
-        'other-key': ['windows', 'mac', 'linux'],
-        'uplay': ['windows', 'mac', 'linux'],
-        'origin': ['windows', 'mac', 'linux'],
-        'wiiu': ['wiiu'],
-        '3DS': ['3DS'],
-        'ps3': ['ps3'],
-        'ps4': ['ps4'],
-        'xboxone': ['xboxone']
-      },
-      'mobile': {
-        'android': ['android'],
-        'iOS': ['iOS']
-      },
-      'video': {
-        'rifftrax': ['rifftrax'],
-        'video-download': ['hd', 'sd']
-      },
-      'music': {
-        'rifftrax': ['rifftrax'],
-        'audio-download': ['mp3', 'flac', 'ogg', 'wav']
-      }
-    }
-    devices = row['device'].split('+')
-    drms = row['drm'].split('+')
-    plats = row['platform'].split('+')
-
     def platformer():
-      if type_icons == 'content':
-        temp_icons = {}
-        for device in devices:
-          temp_icons[device] = {}
-          for drm in drms:
-            if drm in PLAT_ICONS[device]:
-              temp_icons[device][drm] = []
-              for plat in plats:
-                if plat in PLAT_ICONS[device][drm]:
-                  temp_icons[device][drm].append(plat)
-        return temp_icons
-      else:
-        temp_unavailable = {}
-        for device in devices:
-          for drm in drms:
-            if drm in PLAT_ICONS[device]:
-              temp_unavailable[drm] = []
-              for plat in PLAT_ICONS[device][drm]:
-                if plat not in plats and plat != 'android':
-                  temp_unavailable[drm].append(plat)
-        return temp_unavailable
-
+      return build_platform_icons(type_icons, row.device, row.drm, row.platform)
     return platformer
 
   def soundtrack_listing(machine_name):
@@ -149,7 +392,7 @@ def di(row, existing_di=None):
       url = signurl(mp3_path)
       filename, headers = urllib.urlretrieve(url)
       audiofile = MP3(filename)
-      di[row['override']]['soundtrack-hide-tracklist'] = True
+      di[row.override]['soundtrack-hide-tracklist'] = True
       return [
         {
           'preview-length': str(int(math.ceil(audiofile.info.length))),
@@ -163,16 +406,16 @@ def di(row, existing_di=None):
   # Data structure to hold logic & formatted value for each DisplayItem key
   process = {
     'box-art-human-name': {
-      'logic': row['override'] == 'bundle',
-      'value': no_unicode(row['human_name'])
+      'logic': row.override == 'bundle',
+      'value': row.human_name
     },
     'content': {
-      'logic': row['device'] != '0',
+      'logic': len(row.device) != 0,
       'value': platform_icons('content')
     },
     'description-text': {
-      'logic': row['description'] != '0',
-      'value': desc_process(row['description'])
+      'logic': row.description is not None,
+      'value': desc_process(row.description)
     },
     'developers': {
       'logic': True,
@@ -180,40 +423,35 @@ def di(row, existing_di=None):
     },
     'front-page-art': {
       'logic': True,
-      'value': override('images/displayitems/%s' % row['machine_name']) + '.png'
+      'value': override('images/displayitems/%s' % row.machine_name) + '.png'
     },
     'front-page-subtitle': {
-      'logic': row['callout'] != '0',
-      'value': no_unicode(row['callout'])
+      'logic': row.callout is not None,
+      'value': row.callout
     },
     'image_extra': {
-      'logic': row['pdf_preview'] != '0',
-      'value': image_extra(row['machine_name'])
+      'logic': row.pdf_preview,
+      'value': image_extra(row.machine_name)
     },
     'preview-image': {
-      'logic': row['slideout_image'] != '0',
-      'value': 'images/popups/%s_slideout.jpg' % row['machine_name']
+      'logic': row.slideout_image,
+      'value': 'images/popups/%s_slideout.jpg' % row.machine_name
     },
     'publishers': {
       'logic': True,
       'value': partners('publisher')
     },
     'soundtrack-listing': {
-      'logic': row['audio'] != '0',
-      'value': soundtrack_listing(row['machine_name'])
+      'logic': row.audio,
+      'value': soundtrack_listing(row.machine_name)
     },
     'unavailable-platforms': {
-      'logic': row['platform'] not in ('0',
-                                      'windows+mac+linux',
-                                      'windows+mac+linux+android',
-                                      'android',
-                                      'rifftrax+mp3',
-                                      'rifftrax+sd+hd'),
+      'logic': len(row.platform) != 0 and row.platform not in _plat_complete,
       'value': platform_icons('unavailable')
     },
     'youtube-link': {
-      'logic': row['youtube'] != '0',
-      'value': row['youtube']
+      'logic': row.youtube is not None,
+      'value': row.youtube
     }
   }
 
@@ -221,65 +459,63 @@ def di(row, existing_di=None):
   def process_di():
     if existing_di is None:
       di = {
-        'machine_name': row['machine_name'],
+        'machine_name': row.machine_name,
         'struct': {
           'default': {},
-          row['override']: {}
+          row.override: {}
         }
       }
-      di['struct']['default']['human-name'] = di.get('human-name', no_unicode(row['human_name']))
+      di['struct']['default']['human-name'] = di.get('human-name', row.human_name)
     else:
       di = existing_di
       del di['exported_at']
-      di['struct'][row['override']] = di.get(row['override'], {})
+      di['struct'][row.override] = di.get(row.override, {})
     for key in process:
       needed = process[key]['logic']
       value = process[key]['value']
       if needed:
         if callable(value):
-          di['struct'][row['override']][key] = di.get(key, value())
+          di['struct'][row.override][key] = di.get(key, value())
         else:
-          di['struct'][row['override']][key] = di.get(key, value)
+          di['struct'][row.override][key] = di.get(key, value)
 
     # delete empty publishers if not needed
-    if len(di['struct'][row['override']]['developers']) == 0 and 'developers' not in di['struct']['default']:
-      del di['struct'][row['override']]['developers']
-    if len(di['struct'][row['override']]['publishers']) == 0 and 'publishers' not in di['struct']['default']:
-      del di['struct'][row['override']]['publishers']
+    if len(di['struct'][row.override]['developers']) == 0 and 'developers' not in di['struct']['default']:
+      del di['struct'][row.override]['developers']
+    if len(di['struct'][row.override]['publishers']) == 0 and 'publishers' not in di['struct']['default']:
+      del di['struct'][row.override]['publishers']
 
     return di
 
   return process_di()
 
 
-def splits(sotb_info):
-  template = {
-    'initial': {
-      'order': []
-    },
-    'mpa': {
-      'order': []
-    }
-  }
+# Number of significant digits used when dividing sibling splits
+SPLIT_PRECISION = 9
+
+
+# Builds the Splits for every override of a bundle, using local Decimal contexts
+def splits(sotb_info, precision=SPLIT_PRECISION):
+  split_context = Context(prec=precision, rounding=ROUND_HALF_EVEN)
 
   def supersplits(sotb_info):
     supersplits = []
 
     def supersplit_gen(row):
       supersplit = {
-        'class': row['payee'],
-        'name': no_unicode(row['split_name']),
-        'sibling_split': Decimal(row['sib_split']),
+        'class': row.payee,
+        'name': row.split_name,
+        'sibling_split': row.sib_split,
         'subsplit': []
       }
-      if row['invisible_splits'] != '0':
+      if row.invisible_splits:
         supersplit['hide_subsplit'] = 'true'
-      if row['partner_split'] != '0':
-        supersplit['partner_split'] = Decimal(row['partner_split'])
+      if row.partner_split is not None:
+        supersplit['partner_split'] = row.partner_split
       return supersplit
 
     for row in sotb_info:
-      if row['payee'] != '0':
+      if row.payee is not None:
         supersplit = supersplit_gen(row)
         if supersplit not in supersplits:
           supersplits.append(supersplit)
@@ -292,37 +528,44 @@ def splits(sotb_info):
     # Helper function to generate the "base" of each subsplit
     def subsplit_gen(row):
       subsplit = {
-        'class': row['subsplit_payee'],
-        'name': no_unicode(row['subsplit_name'])
+        'class': row.subsplit_payee,
+        'name': row.subsplit_name
       }
-      if row['subsplit_sid'] != '0':
-        subsplit['secondary_id'] = row['subsplit_sid']
+      if row.subsplit_sid is not None:
+        subsplit['secondary_id'] = row.subsplit_sid
       return subsplit
 
     # Adds the proper 'sibling_split'
     def subsplit_siblingsplits(subsplits):
       # Ensures all 'sibling_split' adds to Decimal('1')
       def add_to_one(subsplits):
-        getcontext().prec = 10
+        # Each split is at least 1/len(subsplits), so its last digit is at
+        # most precision + len(str(len(subsplits))) places after the point.
+        # That many digits (plus room for the units) keep the sum exact, and
+        # Inexact is trapped in case they ever don't.
+        remainder_context = Context(
+          prec=precision + len(str(len(subsplits))) + 2,
+          rounding=ROUND_HALF_EVEN,
+          traps=[Inexact]
+        )
         sum_sibling_splits = Decimal('0.0')
         for subsplit in subsplits:
-          sum_sibling_splits += subsplit['sibling_split']
-        diff = Decimal('1.0') - sum_sibling_splits
-        subsplits[0]['sibling_split'] += diff
+          sum_sibling_splits = remainder_context.add(sum_sibling_splits, subsplit['sibling_split'])
+        diff = remainder_context.subtract(Decimal('1.0'), sum_sibling_splits)
+        subsplits[0]['sibling_split'] = remainder_context.add(subsplits[0]['sibling_split'], diff)
         return subsplits
 
-      getcontext().prec = 9
       for subsplit in subsplits:
         if subsplit['name'] == 'Choose Your Own Charity':
           subsplit['sibling_split'] = Decimal('0.0')
         elif subsplit['class'] in ('paypalgivingfund', 'tidesdaf') and 'Choose Your Own Charity' in list_charities:
-          subsplit['sibling_split'] = Decimal('1.0') / Decimal(len(subsplits) - 1)
+          subsplit['sibling_split'] = split_context.divide(Decimal('1.0'), Decimal(len(subsplits) - 1))
         else:
-          subsplit['sibling_split'] = Decimal('1.0') / Decimal(len(subsplits))
+          subsplit['sibling_split'] = split_context.divide(Decimal('1.0'), Decimal(len(subsplits)))
       return add_to_one(subsplits)
 
     for row in sotb_info:
-      if row['payee'] == supersplit['class'] and row[override] != '0' and row['subsplit_payee'] != '0':
+      if row.payee == supersplit['class'] and getattr(row, override) and row.subsplit_payee is not None:
         subsplits.append(subsplit_gen(row))
 
     if len(subsplits) != 0:
@@ -331,43 +574,47 @@ def splits(sotb_info):
     else:
       return []
 
-  def process_splits(splits):
-    for override in splits:
-      if override == 'mpa' and sotb_info[0]['mpa_date'] == '0':
-        continue
-      splits[override]['order'] = supersplits(sotb_info)
-
-    if splits['mpa'] == {'order': []}:
-      del splits['mpa']
-
-    for override in splits:
-
-      for split in splits[override]['order']:
-        split['subsplit'] = subsplits(split, override)
-        if len(split['subsplit']) == 0:
-          del split['subsplit']
-
-    for override in splits:
-      humble_tip = {
-        'class': 'humblebundle',
-        'name': 'Humble Tip',
-        'sibling_split': Decimal('0.20')
-      }
-      if sotb_info[0]['humble_partners'] != '0':
-        humble_tip['partner_split'] = Decimal('0.15')
-      splits[override]['order'].append(humble_tip)
-
-      if sotb_info[0]['humble_partners'] != '0':
-        splits[override]['order'].append({
-          'class': 'partner',
-          'name': 'Partner',
-          'partner_split': Decimal('0.15'),
-          'sibling_split': Decimal('0.0')
-        })
-
+  # Builds the splits of a single override, or None if it isn't needed
+  def process_override(override):
+    if override == 'mpa' and sotb_info[0].mpa_date is None:
+      return None
+    order = supersplits(sotb_info)
+    if override == 'mpa' and len(order) == 0:
+      return None
+
+    for split in order:
+      split['subsplit'] = subsplits(split, override)
+      if len(split['subsplit']) == 0:
+        del split['subsplit']
+
+    humble_tip = {
+      'class': 'humblebundle',
+      'name': 'Humble Tip',
+      'sibling_split': Decimal('0.20')
+    }
+    if sotb_info[0].humble_partners:
+      humble_tip['partner_split'] = Decimal('0.15')
+    order.append(humble_tip)
+
+    if sotb_info[0].humble_partners:
+      order.append({
+        'class': 'partner',
+        'name': 'Partner',
+        'partner_split': Decimal('0.15'),
+        'sibling_split': Decimal('0.0')
+      })
+
+    return {'order': order}
+
+  def process_splits(overrides):
+    splits = {}
+    for override in overrides:
+      override_splits = process_override(override)
+      if override_splits is not None:
+        splits[override] = override_splits
     return splits
 
-  return process_splits(template)
+  return process_splits(['initial', 'mpa'])
 
 
 def ce(sotb_info):
@@ -431,7 +678,7 @@ def ce(sotb_info):
           return 'Warning: You will not receive the %s content! Add just<%%= money_difference %%> more to unlock!' % ('$' + match_obj.group(2))
         else:
           return ''
-      elif tier == 'initial' and sotb_info[0]['one_dollar_min'] != '0':
+      elif tier == 'initial' and sotb_info[0].one_dollar_min:
         return 'Warning: You must pay at least $1.00 to receive content!'
       else:
         return ''
@@ -494,7 +741,7 @@ def ce(sotb_info):
 
     # This re used to see if it's an mpa item or not
     if mpa_match:
-      ce_template['start-dt'] = datetime.strptime(sotb_info[0]['mpa_date'], '%m/%d/%y at %I')
+      ce_template['start-dt'] = datetime.strptime(sotb_info[0].mpa_date, '%m/%d/%y at %I')
 
     # Output the altered ce_template
     return ce_template
@@ -508,9 +755,8 @@ def ce(sotb_info):
       ('coupondefinitions', 'coupon-definition-machine-names')
     ]
     for sotb_reward, reward_type in reward_type_pairs:
-      if row[sotb_reward] != '0':
-        for reward in row[sotb_reward].split('\n'):
-          content_event[reward_type].append(reward)
+      for reward in getattr(row, sotb_reward):
+        content_event[reward_type].append(reward)
 
   def process_ce(content_events):
     # Helper method to find a tier's corresponding ce
@@ -522,15 +768,15 @@ def ce(sotb_info):
     def num_games(tier):
       num = 0
       for row in sotb_info:
-        if row['tier'] == tier:
+        if row.tier == tier:
           num += 1
       return num
 
     tier_list = []
     # collect unique tiers from sotb
     for row in sotb_info:
-      if row['tier'] not in ('', '0') and row['tier'] not in tier_list:
-        tier_list.append(row['tier'])
+      if row.tier is not None and row.tier not in tier_list:
+        tier_list.append(row.tier)
 
     # generate ce skeletons for each tier
     for tier in tier_list:
@@ -538,8 +784,8 @@ def ce(sotb_info):
 
     # Add the proper rewards for each ce
     for row in sotb_info:
-      if row['tier'] != '':
-        ce_rewards(row, find_ce(row['tier']))
+      if row.tier is not None:
+        ce_rewards(row, find_ce(row.tier))
 
     # Add finishing touches to ce
     for ce in content_events:
@@ -551,7 +797,7 @@ def ce(sotb_info):
         else:
           ce['subheader'] = 'Get %s more titles!' % num_games(ce['identifier'])
 
-    if sotb_info[0]['one_dollar_min'] == '1':
+    if sotb_info[0].lessthan1:
       content_events.insert(0, lessthan1_content_event)
 
     return content_events
@@ -591,12 +837,24 @@ parser.add_argument(
   help='flag to indicate if you want Splits to be made',
   action='store_true'
 )
+parser.add_argument(
+  '--split-precision',
+  help='number of significant digits used when dividing sibling splits',
+  default=SPLIT_PRECISION,
+  type=int
+)
 parser.add_argument(
   '-ce',
   '--contentevents',
   help='flag to indicate if you want Content Events to be made',
   action='store_true'
 )
+parser.add_argument(
+  '--platform-icons',
+  help='path to JSON file with extra device/DRM platform icons. See \
+        load_platform_icons() for the format',
+  type=str
+)
 parser.add_argument(
   '-e',
   '--export',
@@ -604,10 +862,19 @@ parser.add_argument(
         exporter. Only to be used if -d flag is on',
   type=str
 )
+parser.add_argument(
+  '-v',
+  '--verbose',
+  help='flag to indicate if you want stats about the run to be printed',
+  action='store_true'
+)
 args = parser.parse_args()
 
 
 if __name__ == '__main__':
+  if args.platform_icons:
+    load_platform_icons(args.platform_icons)
+
   sotb = sotb(args.csvfile)
   existing_di = []
   output_di = []
@@ -620,8 +887,8 @@ if __name__ == '__main__':
   if args.displayitems:
     edi_index = 0
     for row in sotb:
-      if row['machine_name'] != '':
-        if row['exists'] == '0':
+      if row.machine_name != '':
+        if not row.exists:
           output_di.append(di(row))
         else:
           output_di.append(di(row, existing_di[edi_index]))
@@ -630,9 +897,12 @@ if __name__ == '__main__':
 
   # Prepare Splits
   if args.splits:
-    bundle_splits = splits(sotb)
+    bundle_splits = splits(sotb, args.split_precision)
     write_pretty_file(bundle_splits, args.bundle + '_splits')
 
   if args.contentevents:
     bundle_ce = ce(sotb)
     write_pretty_file(bundle_ce, args.bundle + '_contentevents')
+
+  if args.verbose:
+    print no_unicode_report()